@@ -5,12 +5,17 @@ Single communication system - no conflicts, no gRPC, no packet managers
 """
 
 import socket
+import selectors
+import heapq
+import itertools
 import threading
 import time
-import pickle
 import json
-from typing import Dict, Any, List
-from dataclasses import dataclass, asdict
+from collections import deque
+from typing import Dict, Any, List, Tuple
+from dataclasses import dataclass, field, asdict
+
+from clean_protocol import configure_socket, encode_frame, decode_frames, MSGPACK_AVAILABLE
 
 
 @dataclass
@@ -25,7 +30,7 @@ class NodeInfo:
     bandwidth_mbps: int
     used_storage: int = 0
     active_transfers: int = 0
-    last_seen: float = 0.0
+    last_seen: float = 0.0  # time.monotonic() of the last registration or heartbeat
     status: str = 'active'
 
     def get_available_storage(self) -> int:
@@ -56,6 +61,17 @@ class FileInfo:
         self.total_chunks = (self.file_size + self.chunk_size - 1) // self.chunk_size
 
 
+@dataclass(eq=False)
+class ClientConnection:
+    """Buffered state of one client connection in the controller event loop"""
+    sock: socket.socket
+    addr: tuple
+    last_activity: float
+    inbuf: bytearray = field(default_factory=bytearray)
+    outbuf: bytearray = field(default_factory=bytearray)
+    events: int = selectors.EVENT_READ
+
+
 class CleanController:
     """Enhanced distributed cloud storage controller"""
 
@@ -71,12 +87,16 @@ class CleanController:
         # Threading
         self.running = False
         self.socket = None
-        self.lock = threading.RLock()
+        self.selector = None
+        self.connections: Dict[socket.socket, ClientConnection] = {}
+        self.connection_idle_timeout = 60  # Seconds before a silent connection is dropped
+        self.lock = threading.Lock()
+        self._status_display_pending = False
 
         # Statistics
         self.total_connections = 0
         self.active_connections = 0
-        self.max_connections = 15
+        self.max_connections = 64  # Nodes keep one persistent connection each
         self.total_files = 0
         self.total_storage_used = 0
         self.total_transfers = 0
@@ -84,10 +104,15 @@ class CleanController:
         self.failed_transfers = 0
 
         # Performance metrics
-        self.transfer_history = []  # Store recent transfer performance
+        self.transfer_history = deque(maxlen=100)  # Recent transfer performance; oldest entries drop off in O(1)
         self.node_performance = {}  # Track per-node performance
         self.bandwidth_utilization = {}  # Track bandwidth usage
 
+        # Heartbeat monitoring
+        self.heartbeat_timeout = 30  # Seconds without a heartbeat before a node is offline
+        self.liveness_deadlines: List[Tuple[float, str]] = []  # Min-heap of (deadline, node_id)
+        self.node_deadlines: Dict[str, float] = {}  # Current deadline per node; older heap entries are stale
+
         # Replication settings
         self.default_replication_factor = 2
         self.min_nodes_for_replication = 2
@@ -97,6 +122,17 @@ class CleanController:
         self.load_balancing_enabled = True
         self.prefer_local_replicas = True
         self.max_concurrent_transfers_per_node = 3
+
+        # Message dispatch: one dict lookup per message instead of an if/elif chain
+        self.message_handlers = {
+            'REGISTER': self._handle_register,
+            'HEARTBEAT': self._handle_heartbeat,
+            'FILE_CREATED': self._handle_file_created,
+            'LIST_FILES': self._handle_list_files,
+            'DOWNLOAD_REQUEST': self._handle_download_request,
+            'UPLOAD_REQUEST': self._handle_upload_request,
+            'TRANSFER_COMPLETE': self._handle_transfer_complete,
+        }
     
     def start(self):
         """Start the controller"""
@@ -106,7 +142,11 @@ class CleanController:
             self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             self.socket.bind((self.host, self.port))
             self.socket.listen(20)
-            self.socket.settimeout(1.0)
+            self.socket.setblocking(False)
+
+            # One event loop serves every connection instead of a thread per connection
+            self.selector = selectors.DefaultSelector()
+            self.selector.register(self.socket, selectors.EVENT_READ)
             
             self.running = True
             print(f"🌐 Clean Controller started on {self.host}:{self.port}")
@@ -116,80 +156,134 @@ class CleanController:
             heartbeat_thread.start()
             
             # Main server loop
+            last_idle_check = time.monotonic()
             while self.running:
                 try:
-                    conn, addr = self.socket.accept()
-                    
-                    # Limit connections
-                    if self.active_connections < self.max_connections:
-                        self.active_connections += 1
-                        thread = threading.Thread(
-                            target=self._handle_connection,
-                            args=(conn, addr),
-                            daemon=True
-                        )
-                        thread.start()
+                    events = self.selector.select(timeout=1.0)
+                except OSError:
+                    if not self.running:
+                        break  # Listening socket closed by stop()
+                    raise
+
+                for key, mask in events:
+                    if key.data is None:
+                        self._accept_connection()
                     else:
-                        conn.close()
-                        
-                except socket.timeout:
-                    continue
-                except Exception as e:
-                    if self.running:
-                        print(f"⚠️  Accept error: {e}")
+                        self._service_connection(key.data, mask)
+
+                now = time.monotonic()
+                if now - last_idle_check >= 1.0:  # Not on every wake-up, which is once per message
+                    self._close_idle_connections()
+                    last_idle_check = now
                     
         except Exception as e:
             print(f"❌ Controller start failed: {e}")
         finally:
+            for client in list(self.connections.values()):
+                self._close_connection(client)
+            if self.selector:
+                self.selector.close()
             if self.socket:
                 self.socket.close()
     
-    def _handle_connection(self, conn, addr):
-        """Handle client connection"""
+    def _accept_connection(self):
+        """Accept a pending connection and register it with the event loop"""
         try:
-            conn.settimeout(10)
-            
-            # Receive message
-            data = conn.recv(8192)
-            if not data:
-                return
-            
-            message = pickle.loads(data)
-            response = self._process_message(message)
-            
-            # Send response
-            conn.sendall(pickle.dumps(response))
-            
+            conn, addr = self.socket.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            if self.running:
+                print(f"⚠️  Accept error: {e}")
+            return
+
+        # Limit connections
+        if len(self.connections) >= self.max_connections:
+            conn.close()
+            return
+
+        client = ClientConnection(sock=conn, addr=addr, last_activity=time.monotonic())
+        try:
+            conn.setblocking(False)
+            configure_socket(conn)
+            self.selector.register(conn, selectors.EVENT_READ, client)
+        except OSError as e:
+            # Peer may already have reset the connection; drop it and keep serving
+            print(f"⚠️  Connection setup error from {addr}: {e}")
+            conn.close()
+            return
+
+        self.connections[conn] = client
+        self.total_connections += 1
+        self.active_connections = len(self.connections)
+    
+    def _service_connection(self, client: ClientConnection, mask: int):
+        """Handle every complete request from a ready connection and write back the responses"""
+        try:
+            if mask & selectors.EVENT_READ:
+                data = client.sock.recv(65536)
+                if not data:
+                    self._close_connection(client)
+                    return
+
+                client.last_activity = time.monotonic()
+                client.inbuf += data
+                for codec, message in decode_frames(client.inbuf):
+                    response = self._process_message(message)
+                    client.outbuf += encode_frame(response, codec)  # Reply in the codec the node can read
+
+            if client.outbuf:
+                try:
+                    sent = client.sock.send(client.outbuf)
+                    del client.outbuf[:sent]
+                except BlockingIOError:
+                    pass
+
+            # Only watch for writability while a response is still queued
+            events = selectors.EVENT_READ | selectors.EVENT_WRITE if client.outbuf else selectors.EVENT_READ
+            if events != client.events:
+                self.selector.modify(client.sock, events, client)
+                client.events = events
+
+        except (BlockingIOError, InterruptedError):
+            pass
         except Exception as e:
-            print(f"⚠️  Connection error from {addr}: {e}")
-        finally:
-            try:
-                conn.close()
-            except:
-                pass
-            self.active_connections -= 1
+            print(f"⚠️  Connection error from {client.addr}: {e}")
+            self._close_connection(client)
+    
+    def _close_idle_connections(self):
+        """Drop connections that have been silent longer than the idle timeout"""
+        now = time.monotonic()
+        for client in list(self.connections.values()):
+            if now - client.last_activity > self.connection_idle_timeout:
+                self._close_connection(client)
+    
+    def _close_connection(self, client: ClientConnection):
+        """Unregister and close a client connection"""
+        try:
+            self.selector.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        try:
+            client.sock.close()
+        except OSError:
+            pass
+        self.connections.pop(client.sock, None)
+        self.active_connections = len(self.connections)
     
     def _process_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
         """Process incoming message"""
         action = message.get('action', '')
+        handler = self.message_handlers.get(action)
+        if handler is None:
+            return {'status': 'ERROR', 'error': f'Unknown action: {action}'}
         
         with self.lock:
-            if action == 'REGISTER':
-                return self._handle_register(message)
-            elif action == 'HEARTBEAT':
-                return self._handle_heartbeat(message)
-            elif action == 'FILE_CREATED':
-                return self._handle_file_created(message)
-            elif action == 'LIST_FILES':
-                return self._handle_list_files(message)
-            elif action == 'DOWNLOAD_REQUEST':
-                return self._handle_download_request(message)
-            elif action == 'UPLOAD_REQUEST':
-                return self._handle_upload_request(message)
-            elif action == 'TRANSFER_COMPLETE':
-                return self._handle_transfer_complete(message)
-            else:
-                return {'status': 'ERROR', 'error': f'Unknown action: {action}'}
+            response = handler(message)
+
+        # Print status changes without holding the lock other connections need
+        self._flush_status_display()
+        return response
     
     def _handle_register(self, message: Dict[str, Any]) -> Dict[str, Any]:
         """Handle node registration with resource validation"""
@@ -214,17 +308,19 @@ class CleanController:
                 memory_gb=resources['memory_gb'],
                 storage_gb=resources['storage_gb'],
                 bandwidth_mbps=resources['bandwidth_mbps'],
-                last_seen=time.time(),
+                last_seen=time.monotonic(),
                 status='active'
             )
+            self._schedule_liveness_check(node_id, self.nodes[node_id].last_seen + self.heartbeat_timeout)
 
             print(f"🔗 {node_id} connected")
             print(f"✅ {node_id} online (CPU: {resources['cpu_cores']}, RAM: {resources['memory_gb']}GB, Storage: {resources['storage_gb']}GB, BW: {resources['bandwidth_mbps']}Mbps)")
 
             # Display updated network status
-            self._display_network_status()
+            self._request_status_display()
 
-            return {'status': 'OK', 'message': 'Registration successful'}
+            # Nodes keep sending pickle until told the controller can decode msgpack
+            return {'status': 'OK', 'message': 'Registration successful', 'msgpack': MSGPACK_AVAILABLE}
 
         except Exception as e:
             return {'status': 'ERROR', 'error': f'Registration failed: {e}'}
@@ -235,8 +331,12 @@ class CleanController:
             node_id = message['node_id']
             
             if node_id in self.nodes:
-                self.nodes[node_id].last_seen = time.time()
-                self.nodes[node_id].status = 'active'
+                node_info = self.nodes[node_id]
+                node_info.last_seen = time.monotonic()
+                if node_info.status != 'active':
+                    # Back online: offline nodes have no pending liveness check
+                    node_info.status = 'active'
+                    self._schedule_liveness_check(node_id, node_info.last_seen + self.heartbeat_timeout)
                 return {'status': 'ACK'}
             else:
                 return {'status': 'ERROR', 'error': 'Node not registered'}
@@ -274,7 +374,7 @@ class CleanController:
             self._schedule_file_upload(file_record)
 
             # Show updated network status (files will be shown at the end)
-            self._display_network_status()
+            self._request_status_display()
 
             return {'status': 'ACK', 'message': 'File registered and upload scheduled'}
 
@@ -392,23 +492,42 @@ class CleanController:
                         file_info.replica_nodes.append(node_id)
 
                 print(f"✅ {node_id} completed download of {file_info.file_name}")
-                self._display_network_status()
+                self._request_status_display()
 
             return {'status': 'OK', 'message': 'Transfer completion recorded'}
 
         except Exception as e:
             return {'status': 'ERROR', 'error': f'Transfer completion failed: {e}'}
     
-    def _display_files(self):
-        """Display current file list with replication status"""
+    def _request_status_display(self):
+        """Mark the network status as changed; printed once the lock is released"""
+        self._status_display_pending = True
+
+    def _flush_status_display(self):
+        """Render pending status under the lock and print it after releasing it"""
+        if not self._status_display_pending:
+            return  # Common case (e.g. heartbeats): skip the lock entirely
+
+        with self.lock:
+            if not self._status_display_pending:
+                return
+            self._status_display_pending = False
+            lines: List[str] = []
+            self._render_network_status(lines)
+
+        if lines:
+            print("\n".join(lines))
+
+    def _render_files(self, lines: List[str]):
+        """Render current file list with replication status"""
         if not self.files:
-            print("📂 No files available")
+            lines.append("📂 No files available")
             return
 
-        print(f"\n📂 AVAILABLE FILES ({len(self.files)} total)")
-        print("=" * 80)
-        print(f"{'File Name':<25} {'Size':<12} {'Owner':<12} {'Replicas':<15} {'Status':<10}")
-        print("-" * 80)
+        lines.append(f"\n📂 AVAILABLE FILES ({len(self.files)} total)")
+        lines.append("=" * 80)
+        lines.append(f"{'File Name':<25} {'Size':<12} {'Owner':<12} {'Replicas':<15} {'Status':<10}")
+        lines.append("-" * 80)
 
         for file_info in self.files.values():
             size_mb = file_info.file_size / (1024 * 1024)
@@ -420,101 +539,108 @@ class CleanController:
                              if node in self.nodes and self.nodes[node].status == 'active']
             replica_str = f"{len(online_replicas)}/{replica_count}"
 
-            print(f"{file_info.file_name:<25} {size_mb:>8.2f} MB {file_info.owner_node:<12} {replica_str:<15} {status:<10}")
+            lines.append(f"{file_info.file_name:<25} {size_mb:>8.2f} MB {file_info.owner_node:<12} {replica_str:<15} {status:<10}")
 
-        print("=" * 80)
+        lines.append("=" * 80)
 
-    def _display_network_status(self):
-        """Display network and node status"""
+    def _render_network_status(self, lines: List[str]):
+        """Render network and node status"""
         if not self.nodes:
             return
 
-        print(f"\n🌐 NETWORK STATUS ({len(self.nodes)} nodes)")
-        print("=" * 90)
-        print(f"{'Node ID':<12} {'Status':<8} {'CPU':<5} {'RAM':<6} {'Storage':<15} {'BW':<8} {'Files':<6}")
-        print("-" * 90)
+        lines.append(f"\n🌐 NETWORK STATUS ({len(self.nodes)} nodes)")
+        lines.append("=" * 90)
+        lines.append(f"{'Node ID':<12} {'Status':<8} {'CPU':<5} {'RAM':<6} {'Storage':<15} {'BW':<8} {'Files':<6}")
+        lines.append("-" * 90)
+
+        # Snapshot per-report values once instead of rescanning for every node
+        active_nodes = [node for node in self.nodes.values() if node.status == 'active']
+        replica_counts: Dict[str, int] = {}
+        for file_info in self.files.values():
+            for node_id in set(file_info.replica_nodes):
+                replica_counts[node_id] = replica_counts.get(node_id, 0) + 1
 
         for node in self.nodes.values():
             status_icon = "🟢" if node.status == 'active' else "🔴"
             storage_used = node.get_storage_usage_percent()
             storage_str = f"{storage_used:>5.1f}%/{node.storage_gb}GB"
-            file_count = sum(1 for f in self.files.values() if node.node_id in f.replica_nodes)
+            file_count = replica_counts.get(node.node_id, 0)
 
-            print(f"{node.node_id:<12} {status_icon:<8} {node.cpu_cores:<5} {node.memory_gb:<4}GB {storage_str:<15} {node.bandwidth_mbps:<6}M {file_count:<6}")
+            lines.append(f"{node.node_id:<12} {status_icon:<8} {node.cpu_cores:<5} {node.memory_gb:<4}GB {storage_str:<15} {node.bandwidth_mbps:<6}M {file_count:<6}")
 
-        print("=" * 90)
+        lines.append("=" * 90)
 
         # Network-wide storage summary
-        total_storage = sum(node.storage_gb * 1024**3 for node in self.nodes.values() if node.status == 'active')
-        total_used = sum(node.used_storage for node in self.nodes.values() if node.status == 'active')
+        total_storage = sum(node.storage_gb * 1024**3 for node in active_nodes)
+        total_used = sum(node.used_storage for node in active_nodes)
         total_remaining = total_storage - total_used
         usage_percent = (total_used / total_storage * 100) if total_storage > 0 else 0
 
-        print(f"\n💾 NETWORK STORAGE SUMMARY")
-        print("-" * 50)
-        print(f"Total Capacity: {total_storage/(1024**3):.1f} GB")
-        print(f"Used Storage:   {total_used/(1024**3):.1f} GB ({usage_percent:.1f}%)")
-        print(f"Available:      {total_remaining/(1024**3):.1f} GB")
-        print("-" * 50)
+        lines.append(f"\n💾 NETWORK STORAGE SUMMARY")
+        lines.append("-" * 50)
+        lines.append(f"Total Capacity: {total_storage/(1024**3):.1f} GB")
+        lines.append(f"Used Storage:   {total_used/(1024**3):.1f} GB ({usage_percent:.1f}%)")
+        lines.append(f"Available:      {total_remaining/(1024**3):.1f} GB")
+        lines.append("-" * 50)
 
         # Display additional metrics if available
-        self._display_performance_metrics()
-        self._display_system_health()
+        self._render_performance_metrics(lines)
+        self._render_system_health(lines, active_nodes)
 
         # Display files section at the end
-        self._display_files()
+        self._render_files(lines)
 
-    def _display_performance_metrics(self):
-        """Display advanced performance metrics"""
+    def _render_performance_metrics(self, lines: List[str]):
+        """Render advanced performance metrics"""
         if not self.transfer_history and not self.node_performance:
             return
 
-        print(f"\n📊 PERFORMANCE METRICS")
-        print("=" * 80)
+        lines.append(f"\n📊 PERFORMANCE METRICS")
+        lines.append("=" * 80)
 
         # Overall statistics
         success_rate = (self.successful_transfers / self.total_transfers * 100) if self.total_transfers > 0 else 0
-        print(f"📈 Overall Transfer Success Rate: {success_rate:.1f}% ({self.successful_transfers}/{self.total_transfers})")
+        lines.append(f"📈 Overall Transfer Success Rate: {success_rate:.1f}% ({self.successful_transfers}/{self.total_transfers})")
 
         if self.transfer_history:
-            recent_speeds = [t['speed_mbps'] for t in self.transfer_history[-10:] if t['success']]
+            recent_speeds = [t['speed_mbps'] for t in itertools.islice(reversed(self.transfer_history), 10) if t['success']]
             if recent_speeds:
                 avg_speed = sum(recent_speeds) / len(recent_speeds)
-                print(f"⚡ Average Transfer Speed (last 10): {avg_speed:.1f} MB/s")
+                lines.append(f"⚡ Average Transfer Speed (last 10): {avg_speed:.1f} MB/s")
 
         # Per-node performance
         if self.node_performance:
-            print(f"\n🖥️  NODE PERFORMANCE:")
-            print(f"{'Node':<10} {'Success Rate':<12} {'Avg Speed':<12} {'Transfers':<10}")
-            print("-" * 50)
+            lines.append(f"\n🖥️  NODE PERFORMANCE:")
+            lines.append(f"{'Node':<10} {'Success Rate':<12} {'Avg Speed':<12} {'Transfers':<10}")
+            lines.append("-" * 50)
 
             for node_id, perf in self.node_performance.items():
                 success_pct = perf['success_rate'] * 100
                 avg_speed = perf['avg_speed_mbps']
                 total_transfers = perf['total_transfers']
 
-                print(f"{node_id:<10} {success_pct:>8.1f}% {avg_speed:>8.1f} MB/s {total_transfers:>8}")
+                lines.append(f"{node_id:<10} {success_pct:>8.1f}% {avg_speed:>8.1f} MB/s {total_transfers:>8}")
 
-        print("=" * 80)
+        lines.append("=" * 80)
 
-    def _display_system_health(self):
-        """Display comprehensive system health information"""
-        print(f"\n🏥 SYSTEM HEALTH DASHBOARD")
-        print("=" * 80)
+    def _render_system_health(self, lines: List[str], active_nodes: List[NodeInfo]):
+        """Render comprehensive system health information"""
+        lines.append(f"\n🏥 SYSTEM HEALTH DASHBOARD")
+        lines.append("=" * 80)
 
         # Network health
-        active_nodes = sum(1 for node in self.nodes.values() if node.status == 'active')
+        active_count = len(active_nodes)
         total_nodes = len(self.nodes)
-        network_health = (active_nodes / total_nodes * 100) if total_nodes > 0 else 0
+        network_health = (active_count / total_nodes * 100) if total_nodes > 0 else 0
 
-        print(f"🌐 Network Health: {network_health:.1f}% ({active_nodes}/{total_nodes} nodes active)")
+        lines.append(f"🌐 Network Health: {network_health:.1f}% ({active_count}/{total_nodes} nodes active)")
 
         # Storage health
-        total_storage = sum(node.storage_gb for node in self.nodes.values() if node.status == 'active')
-        used_storage = sum(node.used_storage for node in self.nodes.values() if node.status == 'active') / (1024**3)
+        total_storage = sum(node.storage_gb for node in active_nodes)
+        used_storage = sum(node.used_storage for node in active_nodes) / (1024**3)
         storage_utilization = (used_storage / total_storage * 100) if total_storage > 0 else 0
 
-        print(f"💾 Storage Utilization: {storage_utilization:.1f}% ({used_storage:.1f}/{total_storage:.1f} GB)")
+        lines.append(f"💾 Storage Utilization: {storage_utilization:.1f}% ({used_storage:.1f}/{total_storage:.1f} GB)")
 
         # File replication health
         under_replicated = 0
@@ -531,39 +657,37 @@ class CleanController:
         total_files = len(self.files)
         replication_health = (well_replicated / total_files * 100) if total_files > 0 else 100
 
-        print(f"🔄 Replication Health: {replication_health:.1f}% ({well_replicated}/{total_files} files well-replicated)")
+        lines.append(f"🔄 Replication Health: {replication_health:.1f}% ({well_replicated}/{total_files} files well-replicated)")
 
         if under_replicated > 0:
-            print(f"⚠️  {under_replicated} files are under-replicated")
+            lines.append(f"⚠️  {under_replicated} files are under-replicated")
 
         # Load distribution
-        if self.nodes:
-            node_loads = [node.active_transfers for node in self.nodes.values() if node.status == 'active']
-            if node_loads:
-                avg_load = sum(node_loads) / len(node_loads)
-                max_load = max(node_loads)
-                load_balance = (1 - (max_load - avg_load) / max(max_load, 1)) * 100
+        if active_nodes:
+            node_loads = [node.active_transfers for node in active_nodes]
+            avg_load = sum(node_loads) / len(node_loads)
+            max_load = max(node_loads)
+            load_balance = (1 - (max_load - avg_load) / max(max_load, 1)) * 100
 
-                print(f"⚖️  Load Balance: {load_balance:.1f}% (avg: {avg_load:.1f}, max: {max_load})")
+            lines.append(f"⚖️  Load Balance: {load_balance:.1f}% (avg: {avg_load:.1f}, max: {max_load})")
 
         # Per-node storage details
-        print(f"\n📊 PER-NODE STORAGE STATUS")
-        print("-" * 80)
-        print(f"{'Node ID':<12} {'Status':<8} {'Used':<12} {'Available':<12} {'Total':<12} {'Usage %':<8}")
-        print("-" * 80)
+        lines.append(f"\n📊 PER-NODE STORAGE STATUS")
+        lines.append("-" * 80)
+        lines.append(f"{'Node ID':<12} {'Status':<8} {'Used':<12} {'Available':<12} {'Total':<12} {'Usage %':<8}")
+        lines.append("-" * 80)
 
-        for node in self.nodes.values():
-            if node.status == 'active':
-                used_gb = node.used_storage / (1024**3)
-                available_gb = node.get_available_storage() / (1024**3)
-                total_gb = node.storage_gb
-                usage_percent = (node.used_storage / (node.storage_gb * 1024**3) * 100) if node.storage_gb > 0 else 0
+        for node in active_nodes:
+            used_gb = node.used_storage / (1024**3)
+            available_gb = node.get_available_storage() / (1024**3)
+            total_gb = node.storage_gb
+            usage_percent = (node.used_storage / (node.storage_gb * 1024**3) * 100) if node.storage_gb > 0 else 0
 
-                status_icon = "🟢" if usage_percent < 80 else "🟡" if usage_percent < 95 else "🔴"
+            status_icon = "🟢" if usage_percent < 80 else "🟡" if usage_percent < 95 else "🔴"
 
-                print(f"{node.node_id:<12} {status_icon:<8} {used_gb:<8.1f} GB {available_gb:<8.1f} GB {total_gb:<8.1f} GB {usage_percent:<6.1f}%")
+            lines.append(f"{node.node_id:<12} {status_icon:<8} {used_gb:<8.1f} GB {available_gb:<8.1f} GB {total_gb:<8.1f} GB {usage_percent:<6.1f}%")
 
-        print("=" * 80)
+        lines.append("=" * 80)
 
     def _schedule_file_upload(self, file_info: FileInfo):
         """Schedule automatic file upload and replication"""
@@ -702,9 +826,6 @@ class CleanController:
                 'speed_mbps': transfer_speed,
                 'success': success
             })
-
-            if len(self.transfer_history) > 100:
-                self.transfer_history.pop(0)
         else:
             self.failed_transfers += 1
             if node_id in self.node_performance:
@@ -712,32 +833,58 @@ class CleanController:
                 perf['total_transfers'] += 1
                 perf['success_rate'] = perf['successful_transfers'] / perf['total_transfers']
 
+    def _schedule_liveness_check(self, node_id: str, deadline: float):
+        """Schedule the next heartbeat deadline check for a node"""
+        self.node_deadlines[node_id] = deadline
+        heapq.heappush(self.liveness_deadlines, (deadline, node_id))
+
     def _heartbeat_checker(self):
         """Check node heartbeats and handle failures"""
+        consecutive_errors = 0
+
         while self.running:
+            sleep_time = 10  # Longest wait between checks, also used after an error
             try:
-                current_time = time.time()
-                timeout = 30  # 30 second timeout
-
                 with self.lock:
+                    current_time = time.monotonic()
                     nodes_went_offline = []
 
-                    for node_id, node_info in list(self.nodes.items()):
-                        if current_time - node_info.last_seen > timeout:
-                            if node_info.status == 'active':
-                                node_info.status = 'inactive'
-                                nodes_went_offline.append(node_id)
-                                print(f"⚠️  {node_id} went offline")
+                    # Only nodes whose deadline has passed are examined, instead of scanning every node
+                    while self.liveness_deadlines and self.liveness_deadlines[0][0] <= current_time:
+                        deadline, node_id = heapq.heappop(self.liveness_deadlines)
+                        node_info = self.nodes.get(node_id)
+                        if node_info is None or self.node_deadlines.get(node_id) != deadline:
+                            continue  # Superseded by a newer entry
+
+                        next_deadline = node_info.last_seen + self.heartbeat_timeout
+                        if next_deadline > current_time:
+                            # Heard from since this entry was pushed; check again at the new deadline
+                            self._schedule_liveness_check(node_id, next_deadline)
+                        else:
+                            del self.node_deadlines[node_id]
+                            node_info.status = 'inactive'
+                            nodes_went_offline.append(node_id)
+                            print(f"⚠️  {node_id} went offline")
 
                     # Handle node failures - check file availability
                     if nodes_went_offline:
                         self._handle_node_failures(nodes_went_offline)
-                        self._display_network_status()
+                        self._request_status_display()
 
-                time.sleep(10)  # Check every 10 seconds
+                    # Wake up for the earliest deadline rather than on a fixed period
+                    if self.liveness_deadlines:
+                        sleep_time = min(sleep_time, max(0.1, self.liveness_deadlines[0][0] - current_time))
+
+                self._flush_status_display()
+                consecutive_errors = 0
 
             except Exception as e:
-                print(f"⚠️  Heartbeat checker error: {e}")
+                # Report the first few failures only, so a persistent fault cannot flood the console
+                consecutive_errors += 1
+                if consecutive_errors <= 3:
+                    print(f"⚠️  Heartbeat checker error: {e}")
+
+            time.sleep(sleep_time)
 
     def _handle_node_failures(self, failed_nodes: List[str]):
         """Handle node failures and trigger re-replication if needed"""
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Clean Harness
+Shared helpers for the demo, test and benchmark scripts that launch a local controller and nodes
+"""
+
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+from typing import Dict, Optional
+
+# Controller endpoint used by clean_node.py defaults
+CONTROLLER_HOST = 'localhost'
+CONTROLLER_PORT = 5000
+NODE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'clean_node.py')
+
+
+def wait_for_controller(process: Optional[subprocess.Popen] = None, timeout: float = 10.0) -> bool:
+    """Wait until the controller is accepting connections"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process and process.poll() is not None:
+            return False  # Controller exited before it started listening
+        try:
+            with socket.create_connection((CONTROLLER_HOST, CONTROLLER_PORT), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+class LocalCluster:
+    """Controller and node processes launched by a test or benchmark run"""
+
+    def __init__(self, scratch_prefix: str):
+        self.controller_process: Optional[subprocess.Popen] = None
+        self.node_processes: Dict[str, subprocess.Popen] = {}
+        self.scratch_prefix = scratch_prefix
+        self.storage_root = None  # Scratch directory holding this run's node storage
+        self.running = True
+
+    def node_working_dir(self) -> str:
+        """Directory nodes run in, so their storage never touches a user's own node_storage_* dirs"""
+        if self.storage_root is None:
+            self.storage_root = tempfile.mkdtemp(prefix=self.scratch_prefix)
+        return self.storage_root
+
+    def stop_all_nodes(self):
+        """Stop all nodes"""
+        for node_id in list(self.node_processes.keys()):
+            try:
+                process = self.node_processes[node_id]
+                process.terminate()
+                process.wait(timeout=3)
+                del self.node_processes[node_id]
+            except Exception:
+                pass
+
+    def stop_all(self):
+        """Stop all processes"""
+        if not self.running:
+            return  # Already stopped by the run's own cleanup
+        self.running = False
+        print("\n🛑 Stopping all processes...")
+
+        self.stop_all_nodes()
+
+        if self.controller_process:
+            try:
+                self.controller_process.terminate()
+                self.controller_process.wait(timeout=5)
+                print("✅ Controller stopped")
+            except Exception as e:
+                print(f"⚠️  Force killing controller: {e}")
+                self.controller_process.kill()
+
+        self.cleanup_storage()
+
+    def cleanup_storage(self):
+        """Remove the scratch directory holding this run's node storage"""
+        if self.storage_root is None:
+            return
+        shutil.rmtree(self.storage_root, ignore_errors=True)
+        self.storage_root = None
+        print("🧹 Node storage cleaned up")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Clean Protocol
+Length-prefixed message framing shared by the controller and nodes
+"""
+
+import socket
+import struct
+import pickle
+from typing import Dict, Any, Optional, List, Tuple, BinaryIO
+
+try:
+    import msgspec  # Optional: faster and smaller than pickle for plain dict messages
+except ImportError:
+    msgspec = None
+
+MSGPACK_AVAILABLE = msgspec is not None
+
+# Every message is a 4-byte big-endian payload length and a 1-byte codec id, followed by the payload
+HEADER_FORMAT = '>IB'
+_HEADER = struct.Struct(HEADER_FORMAT)  # Compiled once instead of re-parsing the format per message
+HEADER_SIZE = _HEADER.size
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024  # Reject corrupt or oversized length prefixes
+
+CODEC_PICKLE = 0
+CODEC_MSGPACK = 1
+
+if msgspec is not None:
+    _msgpack_encoder = msgspec.msgpack.Encoder()
+    _msgpack_decoder = msgspec.msgpack.Decoder()
+
+
+def _encode(message: Dict[str, Any], codec: int):
+    """Serialize a message with the given codec"""
+    if codec == CODEC_MSGPACK and msgspec is not None:
+        return CODEC_MSGPACK, _msgpack_encoder.encode(message)
+    return CODEC_PICKLE, pickle.dumps(message)
+
+
+def _decode(codec: int, payload: bytes) -> Dict[str, Any]:
+    """Deserialize a message with the codec the sender used"""
+    if codec == CODEC_MSGPACK:
+        if msgspec is None:
+            raise ValueError("Received a msgpack message but msgspec is not installed")
+        return _msgpack_decoder.decode(payload)
+    if codec == CODEC_PICKLE:
+        return pickle.loads(payload)
+    raise ValueError(f"Unknown message codec: {codec}")
+
+
+def configure_socket(sock: socket.socket):
+    """Tune a connected socket for small request/response messages"""
+    # Messages are sent in a single write, so Nagle's algorithm only adds latency
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    if hasattr(socket, 'TCP_QUICKACK'):  # Linux only
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+
+
+def encode_frame(message: Dict[str, Any], codec: int = CODEC_PICKLE) -> bytearray:
+    """Serialize a message into a single frame. Pickle unless the peer is known to read msgpack;
+    replies reuse the request's codec"""
+    codec, payload = _encode(message, codec)
+    frame = bytearray(HEADER_SIZE + len(payload))
+    _HEADER.pack_into(frame, 0, len(payload), codec)
+    frame[HEADER_SIZE:] = payload
+    return frame
+
+
+def decode_frames(buffer: bytearray) -> List[Tuple[int, Dict[str, Any]]]:
+    """Remove every complete frame from the start of buffer and return (codec, message) pairs"""
+    messages = []
+    offset = 0
+    while len(buffer) - offset >= HEADER_SIZE:
+        size, codec = _HEADER.unpack_from(buffer, offset)
+        if size > MAX_MESSAGE_SIZE:
+            raise ValueError(f"Message too large: {size} bytes")
+
+        end = offset + HEADER_SIZE + size
+        if len(buffer) < end:
+            break  # Rest of the frame has not arrived yet
+        messages.append((codec, _decode(codec, buffer[offset + HEADER_SIZE:end])))
+        offset = end
+
+    del buffer[:offset]
+    return messages
+
+
+def send_message(sock: socket.socket, message: Dict[str, Any], codec: int = CODEC_PICKLE):
+    """Send a single framed message"""
+    sock.sendall(encode_frame(message, codec))
+
+
+def _read_exact(reader: BinaryIO, size: int) -> Optional[bytearray]:
+    """Read exactly size bytes, or None if the peer closed first"""
+    # Each read lands directly in its final slot; no growing buffer or final copy
+    data = bytearray(size)
+    view = memoryview(data)
+    received = 0
+    while received < size:
+        count = reader.readinto(view[received:])
+        if not count:
+            return None
+        received += count
+    return data
+
+
+def read_message(reader: BinaryIO) -> Optional[Dict[str, Any]]:
+    """Read a single framed message from a buffered socket reader (sock.makefile('rb')),
+    or None if the connection closed cleanly"""
+    header = _read_exact(reader, HEADER_SIZE)
+    if header is None:
+        return None
+
+    size, codec = _HEADER.unpack(header)
+    if size > MAX_MESSAGE_SIZE:
+        raise ValueError(f"Message too large: {size} bytes")
+
+    payload = _read_exact(reader, size)
+    if payload is None:
+        raise ConnectionError("Connection closed mid-message")
+
+    return _decode(codec, payload)
@@ -11,6 +11,11 @@ import sys
 import os
 from typing import List, Dict, Any
 
+from clean_harness import wait_for_controller
+
+# Console flags for windowed processes (CREATE_NEW_CONSOLE only exists on Windows)
+_NEW_CONSOLE_FLAGS = subprocess.CREATE_NEW_CONSOLE if os.name == 'nt' else 0
+
 class CompleteUsageDemo:
     """Complete step-by-step demonstration of all system features"""
     
@@ -59,9 +64,11 @@ class CompleteUsageDemo:
         try:
             self.controller_process = subprocess.Popen(
                 ['python', 'clean_controller.py'],
-                creationflags=subprocess.CREATE_NEW_CONSOLE if os.name == 'nt' else 0
+                creationflags=_NEW_CONSOLE_FLAGS
             )
-            time.sleep(3)
+            if not wait_for_controller(self.controller_process):
+                print("❌ Controller did not start listening in time")
+                return False
             print("\n✅ Controller started successfully in separate window")
             print("💡 You can see controller logs and network status in the controller window")
             return True
@@ -99,15 +106,12 @@ class CompleteUsageDemo:
                     text=True
                 )
                 self.node_processes[node_id] = process
-                time.sleep(2)
-                print(f"   ✅ {node_id} started and registered")
+                print(f"   ✅ {node_id} started")
             except Exception as e:
                 print(f"   ❌ Failed to start {node_id}: {e}")
         
         print(f"\n🎉 Background ecosystem established with {len(background_nodes)} nodes")
         print("🔄 Nodes are registering with controller and establishing replication...")
-        
-        time.sleep(8)  # Allow nodes to fully register
         return True
     
     def start_interactive_nodes(self):
@@ -137,10 +141,9 @@ class CompleteUsageDemo:
             try:
                 process = subprocess.Popen(
                     cmd,
-                    creationflags=subprocess.CREATE_NEW_CONSOLE if os.name == 'nt' else 0
+                    creationflags=_NEW_CONSOLE_FLAGS
                 )
                 self.interactive_nodes[node_id] = process
-                time.sleep(3)
                 print(f"   ✅ {node_id} interactive terminal opened")
             except Exception as e:
                 print(f"   ❌ Failed to start {node_id}: {e}")
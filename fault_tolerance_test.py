@@ -13,13 +13,13 @@ import sys
 import os
 from typing import List, Dict, Any
 
-class FaultToleranceTest:
+from clean_harness import NODE_SCRIPT, LocalCluster, wait_for_controller
+
+class FaultToleranceTest(LocalCluster):
     """Comprehensive fault tolerance testing system"""
     
     def __init__(self):
-        self.controller_process = None
-        self.node_processes = {}
-        self.running = True
+        super().__init__(scratch_prefix='cloudsim_fault_')
         self.test_results = {}
         
         # Test node configurations
@@ -51,7 +51,9 @@ class FaultToleranceTest:
                 stderr=subprocess.PIPE,
                 text=True
             )
-            time.sleep(3)
+            if not wait_for_controller(self.controller_process):
+                print("❌ Controller did not start listening in time")
+                return False
             print("✅ Controller started")
             return True
         except Exception as e:
@@ -63,7 +65,7 @@ class FaultToleranceTest:
         config = self.node_configs[node_id]
         
         cmd = [
-            'python', 'clean_node.py',
+            'python', NODE_SCRIPT,
             '--node-id', node_id,
             '--cpu', str(config['cpu']),
             '--memory', str(config['memory']),
@@ -74,6 +76,7 @@ class FaultToleranceTest:
         try:
             process = subprocess.Popen(
                 cmd,
+                cwd=self.node_working_dir(),
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True
@@ -329,21 +332,6 @@ class FaultToleranceTest:
         for node_id in list(self.node_processes.keys()):
             self.stop_node(node_id)
     
-    def stop_all(self):
-        """Stop all processes"""
-        print("\n🛑 Stopping all processes...")
-        
-        self.stop_all_nodes()
-        
-        if self.controller_process:
-            try:
-                self.controller_process.terminate()
-                self.controller_process.wait(timeout=5)
-                print("✅ Controller stopped")
-            except Exception as e:
-                print(f"⚠️  Force killing controller: {e}")
-                self.controller_process.kill()
-    
     def display_test_results(self, results: Dict[str, bool]):
         """Display comprehensive test results"""
         print("\n" + "="*80)
@@ -13,12 +13,13 @@ import sys
 import os
 from typing import List, Dict, Any, Tuple
 
-class PerformanceBenchmark:
+from clean_harness import NODE_SCRIPT, LocalCluster, wait_for_controller
+
+class PerformanceBenchmark(LocalCluster):
     """Comprehensive performance benchmarking system"""
     
     def __init__(self):
-        self.controller_process = None
-        self.node_processes = {}
+        super().__init__(scratch_prefix='cloudsim_bench_')
         self.benchmark_results = {}
         
         # Benchmark configurations
@@ -49,7 +50,9 @@ class PerformanceBenchmark:
                 stderr=subprocess.PIPE,
                 text=True
             )
-            time.sleep(3)
+            if not wait_for_controller(self.controller_process):
+                print("❌ Controller did not start listening in time")
+                return False
             print("✅ Controller started")
             return True
         except Exception as e:
@@ -61,7 +64,7 @@ class PerformanceBenchmark:
         config = self.node_configs[node_id]
         
         cmd = [
-            'python', 'clean_node.py',
+            'python', NODE_SCRIPT,
             '--node-id', node_id,
             '--cpu', str(config['cpu']),
             '--memory', str(config['memory']),
@@ -72,6 +75,7 @@ class PerformanceBenchmark:
         try:
             process = subprocess.Popen(
                 cmd,
+                cwd=self.node_working_dir(),
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True
@@ -347,33 +351,6 @@ class PerformanceBenchmark:
         finally:
             self.stop_all()
     
-    def stop_all_nodes(self):
-        """Stop all nodes"""
-        for node_id in list(self.node_processes.keys()):
-            if node_id in self.node_processes:
-                try:
-                    process = self.node_processes[node_id]
-                    process.terminate()
-                    process.wait(timeout=3)
-                    del self.node_processes[node_id]
-                except:
-                    pass
-    
-    def stop_all(self):
-        """Stop all processes"""
-        print("\n🛑 Stopping all processes...")
-        
-        self.stop_all_nodes()
-        
-        if self.controller_process:
-            try:
-                self.controller_process.terminate()
-                self.controller_process.wait(timeout=5)
-                print("✅ Controller stopped")
-            except Exception as e:
-                print(f"⚠️  Force killing controller: {e}")
-                self.controller_process.kill()
-    
     def display_benchmark_results(self):
         """Display comprehensive benchmark results"""
         print("\n" + "="*80)